@@ -12,6 +12,10 @@ Usage:
   python3 cors_server.py          # port 8000
   python3 cors_server.py 3000     # port 3000
 
+Precompressed assets: if the browser accepts it, a request for foo.json is
+answered with foo.json.br or foo.json.gz when that sibling exists (see
+precompress-assets.sh). Range requests always get the original bytes.
+
 Note: COOP/COEP enables SharedArrayBuffer for multi-thread wllama.
       Using 'credentialless' (not 'require-corp') so cross-origin CDN
       scripts (Tailwind, Alpine) load without needing CORP headers.
@@ -19,11 +23,42 @@ Note: COOP/COEP enables SharedArrayBuffer for multi-thread wllama.
       Response objects for full compatibility.
 """
 
-from http.server import HTTPServer, SimpleHTTPRequestHandler
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import io
+import os
+import re
 import sys
 
+# Single byte range: "bytes=START-[END]" or suffix form "bytes=-LENGTH"
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+# Content-Encoding → precompressed sibling suffix, in order of preference
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+def accepted_encodings(header):
+    """Parse Accept-Encoding into the set of codings not refused with q=0."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            q = 1.0
+        if coding and q > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
 
 class CORSCOEPHandler(SimpleHTTPRequestHandler):
+    # HTTP/1.1 keeps connections alive between requests, so the browser can
+    # reuse one socket for many shard fetches (every response sets Content-Length).
+    protocol_version = 'HTTP/1.1'
+
+    # Bytes left to send for the current 206 response (None = whole file)
+    _range_count = None
+
     def end_headers(self):
         # CORS
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -35,16 +70,84 @@ class CORSCOEPHandler(SimpleHTTPRequestHandler):
         self.send_header('Cross-Origin-Embedder-Policy', 'credentialless')
         # Allow SW to control all paths
         self.send_header('Service-Worker-Allowed', '/')
+        self.send_header('Accept-Ranges', 'bytes')
         SimpleHTTPRequestHandler.end_headers(self)
 
+    def send_head(self):
+        self._range_count = None
+        range_header = self.headers.get('Range')
+        if range_header:
+            path = self.translate_path(self.path)
+            m = RANGE_RE.match(range_header.strip())
+            # Multi-range or malformed → ignore Range and send the full file
+            if m and m.group(0) != 'bytes=-' and os.path.isfile(path):
+                return self.send_range_head(path, m)
+
+        # Serve a precompressed sibling (.br / .gz) when the client accepts it
+        if not range_header:
+            path = self.translate_path(self.path)
+            accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+            for coding, suffix in PRECOMPRESSED:
+                if coding in accepted and os.path.isfile(path) and os.path.isfile(path + suffix):
+                    f = open(path + suffix, 'rb')
+                    fs = os.fstat(f.fileno())
+                    self.send_response(200)
+                    self.send_header('Content-Type', self.guess_type(path))
+                    self.send_header('Content-Encoding', coding)
+                    self.send_header('Content-Length', str(fs.st_size))
+                    self.send_header('Last-Modified', self.date_time_string(fs.st_mtime))
+                    self.send_header('Vary', 'Accept-Encoding')
+                    self.end_headers()
+                    return f
+        return SimpleHTTPRequestHandler.send_head(self)
+
+    def send_range_head(self, path, m):
+        """Send 206 (or 416) headers for one byte range; returns the positioned file."""
+        f = open(path, 'rb')
+        fs = os.fstat(f.fileno())
+        size = fs.st_size
+        first, last = m.groups()
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start, end = max(0, size - int(last)), size - 1
+        if start >= size or start > end:
+            f.close()
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Last-Modified', self.date_time_string(fs.st_mtime))
+        self.end_headers()
+        f.seek(start)
+        self._range_count = end - start + 1
+        return f
+
+    def copyfile(self, source, outputfile):
+        # Zero-copy page cache → socket via sendfile(2) for real files;
+        # socket.sendfile() itself falls back to send() where unsupported.
+        sock = getattr(outputfile, '_sock', None)
+        if sock is None or isinstance(source, io.BytesIO):
+            return SimpleHTTPRequestHandler.copyfile(self, source, outputfile)
+        outputfile.flush()
+        sock.sendfile(source, offset=source.tell(), count=self._range_count)
+
     def do_OPTIONS(self):
         self.send_response(200, 'ok')
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
 
 if __name__ == '__main__':
     port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
-    httpd = HTTPServer(('0.0.0.0', port), CORSCOEPHandler)
+    # One thread per connection — parallel shard/range fetches don't queue
+    httpd = ThreadingHTTPServer(('0.0.0.0', port), CORSCOEPHandler)
     print(f'Serving at http://localhost:{port}')
     print(f'  CORS: ✓  COOP: same-origin  COEP: credentialless')
     print(f'  SharedArrayBuffer: ✓  CDN scripts: ✓  SW: ✓')
@@ -15,8 +15,16 @@ Usage:
     --source https://cdn.jsdelivr.net/gh/user/cdn-llm@v1 \
     --manifest q4_0
 
+  # Force CPU-only decode:
+  python example-inference-llm.py --source /path/to/pkg-gemma3 --n-gpu-layers 0
+
 Requirements:
   pip install llama-cpp-python
+
+GPU offload needs a llama-cpp-python wheel built with a GPU backend, e.g.
+  CMAKE_ARGS="-DGGML_CUDA=on"  pip install llama-cpp-python   # NVIDIA
+  CMAKE_ARGS="-DGGML_METAL=on" pip install llama-cpp-python   # Apple Silicon
+A CPU-only build ignores --n-gpu-layers.
 """
 
 import argparse, os, sys, time
@@ -25,7 +33,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from model_resolver import ModelResolver, resolve_gguf
 
 try:
-    from llama_cpp import Llama
+    from llama_cpp import Llama, LlamaRAMCache
 except ImportError:
     sys.exit("pip install llama-cpp-python")
 
@@ -37,6 +45,8 @@ def main():
     p.add_argument('--manifest', default='q4_0')
     p.add_argument('--cache-dir', default='./.model-cache')
     p.add_argument('--max-tokens', type=int, default=128)
+    p.add_argument('--n-gpu-layers', type=int, default=-1,
+                   help='Layers to offload to GPU (-1 = all, 0 = CPU only)')
     args = p.parse_args()
 
     prog = lambda p: print(f"\r  [{p['percent']:3d}%] {p['file'][:50]:<50s}", end='', flush=True)
@@ -57,8 +67,25 @@ def main():
     # ── 2. Load model ────────────────────────────────────────────────────
     print("\nLoading model with llama-cpp-python...")
     t0 = time.time()
-    llm = Llama(model_path=model_path, n_ctx=2048, n_gpu_layers=0, verbose=False)
-    print(f"  ✓ Model loaded ({time.time()-t0:.1f}s)")
+    # Use every core (capped — decode stops scaling past ~16) and a larger
+    # prompt batch so prefill runs in fewer, bigger chunks.
+    n_threads = min(16, os.cpu_count() or 8)
+    llm_kwargs = dict(model_path=model_path, n_ctx=2048,
+                      n_threads=n_threads, n_threads_batch=n_threads,
+                      n_batch=2048, n_ubatch=512, verbose=False)
+    n_gpu_layers = args.n_gpu_layers
+    try:
+        llm = Llama(n_gpu_layers=n_gpu_layers, **llm_kwargs)
+    except ValueError as e:
+        if n_gpu_layers == 0:
+            raise
+        print(f"  ⚠ GPU offload failed ({e}), falling back to CPU")
+        n_gpu_layers = 0
+        llm = Llama(n_gpu_layers=0, **llm_kwargs)
+    # Keep KV state for previously seen prompt prefixes so each multi-turn
+    # request only prefills the new messages, not the whole history again.
+    llm.set_cache(LlamaRAMCache(capacity_bytes=512 << 20))
+    print(f"  ✓ Model loaded ({time.time()-t0:.1f}s, {n_threads} threads, n_gpu_layers={n_gpu_layers})")
 
     # ── 3. Single-turn inference ─────────────────────────────────────────
     print("\n" + "=" * 60)
@@ -22,11 +22,15 @@ Usage:
 
   # Custom cache dir:
   python example-inference-onnx.py --cache-dir ./my-cache ...
+
+  # Warm daemon: load once, then answer one JSON line per stdin line.
+  # A plain text line is embedded; {"query": ..., "documents": [...]} is reranked.
+  python example-inference-onnx.py --serve ... < queries.txt
 """
 
 import argparse
+import contextlib
 import json
-import math
 import os
 import sys
 import time
@@ -48,11 +52,110 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from model_resolver import ModelResolver
 
 
-def cosine_similarity(a, b):
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = math.sqrt(sum(x * x for x in a))
-    norm_b = math.sqrt(sum(x * x for x in b))
-    return dot / (norm_a * norm_b) if norm_a and norm_b else 0.0
+def enable_batch_padding(tokenizer):
+    """Pad encode_batch() output to the longest sequence, keeping the model's pad token."""
+    pad = tokenizer.padding or {}
+    pad_token = pad.get('pad_token')
+    if not pad_token:
+        pad_token = next((t for t in ('<pad>', '[PAD]', '<|pad|>')
+                          if tokenizer.token_to_id(t) is not None), '[PAD]')
+    pad_id = tokenizer.token_to_id(pad_token)
+    tokenizer.enable_padding(pad_id=pad_id if pad_id is not None else 0, pad_token=pad_token)
+
+
+def make_session_options():
+    """Full graph fusions and one intra-op thread per core (ORT defaults are conservative)."""
+    so = ort.SessionOptions()
+    so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    so.intra_op_num_threads = os.cpu_count() or 1
+    so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    return so
+
+
+def pick_providers():
+    """GPU execution providers first when this onnxruntime build has them, CPU last."""
+    available = ort.get_available_providers()
+    gpu = [p for p in ('CUDAExecutionProvider', 'DmlExecutionProvider') if p in available]
+    return gpu + ['CPUExecutionProvider']
+
+
+def run_with_binding(session, feeds):
+    """session.run() via IOBinding: numpy inputs are bound in place, outputs stay in ORT memory."""
+    binding = session.io_binding()
+    for name, arr in feeds.items():
+        binding.bind_cpu_input(name, np.ascontiguousarray(arr))
+    for out in session.get_outputs():
+        binding.bind_output(out.name, 'cpu')
+    session.run_with_iobinding(binding)
+    return [v.numpy() for v in binding.get_outputs()]
+
+
+def load_once(emb_dir, rr_dir):
+    """Load tokenizers and ONNX sessions (the expensive step --serve amortizes)."""
+    print("\n" + "="*60)
+    print("Loading tokenizers...")
+    emb_tokenizer = Tokenizer.from_file(os.path.join(emb_dir, 'tokenizer.json'))
+    rr_tokenizer = Tokenizer.from_file(os.path.join(rr_dir, 'tokenizer.json'))
+    # Configure padding/truncation once; encode_batch() then tokenizes every
+    # input in parallel (Rust threads) with no per-call state toggling.
+    enable_batch_padding(emb_tokenizer)
+    rr_tokenizer.no_truncation()
+    enable_batch_padding(rr_tokenizer)
+    print("  ✓ Tokenizers loaded")
+
+    print("Creating ONNX sessions...")
+    so = make_session_options()
+    providers = pick_providers()
+    emb_session = ort.InferenceSession(os.path.join(emb_dir, 'onnx', 'model_q4f16.onnx'),
+                                       sess_options=so, providers=providers)
+    rr_session = ort.InferenceSession(os.path.join(rr_dir, 'onnx', 'model_quantized.onnx'),
+                                      sess_options=so, providers=providers)
+    print(f"  ✓ Embedding: inputs={emb_session.get_inputs()[0].name}, outputs={[o.name for o in emb_session.get_outputs()]}")
+    print(f"  ✓ Reranker:  inputs={rr_session.get_inputs()[0].name}, outputs={[o.name for o in rr_session.get_outputs()]}")
+    print(f"  ✓ Providers: {emb_session.get_providers()}, intra-op threads: {so.intra_op_num_threads}")
+    return emb_tokenizer, emb_session, rr_tokenizer, rr_session
+
+
+def embed(tokenizer, session, texts):
+    """Embed a list of texts with one padded batch → one session.run."""
+    encoded = tokenizer.encode_batch(texts)
+    ids = np.array([e.ids for e in encoded], dtype=np.int64)
+    mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+    outputs = session.run(None, {'input_ids': ids, 'attention_mask': mask})
+    # sentence_embedding is the second output; otherwise mean-pool unpadded tokens
+    if len(outputs) > 1:
+        return outputs[1]
+    m = mask[..., None].astype(outputs[0].dtype)
+    return (outputs[0] * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1)
+
+
+def rerank(tokenizer, session, query, documents):
+    """Score (query, document) pairs in one batch — higher = more relevant."""
+    encoded = tokenizer.encode_batch([(query, doc) for doc in documents])
+    ids = np.array([e.ids for e in encoded], dtype=np.int64)
+    mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+    outputs = run_with_binding(session, {'input_ids': ids, 'attention_mask': mask})
+    return [float(row[0]) for row in outputs[0]]
+
+
+def serve(emb_tokenizer, emb_session, rr_tokenizer, rr_session):
+    """Answer stdin requests with warm sessions, one JSON result line each."""
+    print("Ready — reading requests from stdin", file=sys.stderr)
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            req = json.loads(line) if line.startswith('{') else {'text': line}
+            if 'query' in req:
+                scores = rerank(rr_tokenizer, rr_session, req['query'], req['documents'])
+                result = {'query': req['query'], 'scores': scores}
+            else:
+                emb = embed(emb_tokenizer, emb_session, [req['text']])[0]
+                result = {'text': req['text'], 'embedding': emb.tolist()}
+        except Exception as e:
+            result = {'error': str(e)}
+        print(json.dumps(result), flush=True)
 
 
 def main():
@@ -67,44 +170,41 @@ def main():
                         help='Manifest name for reranker model (default: quantized)')
     parser.add_argument('--cache-dir', default='./.model-cache',
                         help='Cache directory (default: ./.model-cache)')
+    parser.add_argument('--serve', action='store_true',
+                        help='Keep sessions warm and answer stdin lines with JSON')
     args = parser.parse_args()
 
-    resolver = ModelResolver(cache_dir=args.cache_dir)
+    # In --serve mode stdout carries only JSON results; progress goes to stderr
+    with contextlib.redirect_stdout(sys.stderr if args.serve else sys.stdout):
+        resolver = ModelResolver(cache_dir=args.cache_dir)
 
-    # ─── 1. Resolve embedding model ─────────────────────────────────────
-    print("="*60)
-    print("Resolving embedding model...")
-    t0 = time.time()
-    emb_dir = resolver.resolve(
-        args.embedding_source,
-        manifest=args.embedding_manifest,
-        on_progress=lambda p: print(f"\r  [{p['percent']:3d}%] {p['file'][:50]}", end='', flush=True),
-    )
-    print(f"\n  → {emb_dir}  ({time.time()-t0:.1f}s)")
-
-    # ─── 2. Resolve reranker model ──────────────────────────────────────
-    print("\nResolving reranker model...")
-    t0 = time.time()
-    rr_dir = resolver.resolve(
-        args.reranker_source,
-        manifest=args.reranker_manifest,
-        on_progress=lambda p: print(f"\r  [{p['percent']:3d}%] {p['file'][:50]}", end='', flush=True),
-    )
-    print(f"\n  → {rr_dir}  ({time.time()-t0:.1f}s)")
-
-    # ─── 3. Load tokenizers ─────────────────────────────────────────────
-    print("\n" + "="*60)
-    print("Loading tokenizers...")
-    emb_tokenizer = Tokenizer.from_file(os.path.join(emb_dir, 'tokenizer.json'))
-    rr_tokenizer = Tokenizer.from_file(os.path.join(rr_dir, 'tokenizer.json'))
-    print("  ✓ Tokenizers loaded")
+        # ─── 1. Resolve embedding model ─────────────────────────────────
+        print("="*60)
+        print("Resolving embedding model...")
+        t0 = time.time()
+        emb_dir = resolver.resolve(
+            args.embedding_source,
+            manifest=args.embedding_manifest,
+            on_progress=lambda p: print(f"\r  [{p['percent']:3d}%] {p['file'][:50]}", end='', flush=True),
+        )
+        print(f"\n  → {emb_dir}  ({time.time()-t0:.1f}s)")
+
+        # ─── 2. Resolve reranker model ──────────────────────────────────
+        print("\nResolving reranker model...")
+        t0 = time.time()
+        rr_dir = resolver.resolve(
+            args.reranker_source,
+            manifest=args.reranker_manifest,
+            on_progress=lambda p: print(f"\r  [{p['percent']:3d}%] {p['file'][:50]}", end='', flush=True),
+        )
+        print(f"\n  → {rr_dir}  ({time.time()-t0:.1f}s)")
 
-    # ─── 4. Create ONNX sessions ────────────────────────────────────────
-    print("Creating ONNX sessions...")
-    emb_session = ort.InferenceSession(os.path.join(emb_dir, 'onnx', 'model_q4f16.onnx'))
-    rr_session = ort.InferenceSession(os.path.join(rr_dir, 'onnx', 'model_quantized.onnx'))
-    print(f"  ✓ Embedding: inputs={emb_session.get_inputs()[0].name}, outputs={[o.name for o in emb_session.get_outputs()]}")
-    print(f"  ✓ Reranker:  inputs={rr_session.get_inputs()[0].name}, outputs={[o.name for o in rr_session.get_outputs()]}")
+        # ─── 3-4. Load tokenizers + create ONNX sessions ────────────────
+        emb_tokenizer, emb_session, rr_tokenizer, rr_session = load_once(emb_dir, rr_dir)
+
+    if args.serve:
+        serve(emb_tokenizer, emb_session, rr_tokenizer, rr_session)
+        return
 
     # ─── 5. Embedding inference ─────────────────────────────────────────
     print("\n" + "="*60)
@@ -118,27 +218,28 @@ def main():
         "The stock market closed higher on Friday.",
     ]
 
-    embeddings = []
-    for sent in sentences:
-        encoded = emb_tokenizer.encode(sent)
-        ids = np.array([encoded.ids], dtype=np.int64)
-        mask = np.array([encoded.attention_mask], dtype=np.int64)
-
-        t0 = time.time()
-        outputs = emb_session.run(None, {'input_ids': ids, 'attention_mask': mask})
-        dt = time.time() - t0
-
-        # sentence_embedding is the second output
-        emb = outputs[1][0] if len(outputs) > 1 else outputs[0][0].mean(axis=0)
-        embeddings.append(emb)
+    t0 = time.time()
+    batch_emb = embed(emb_tokenizer, emb_session, sentences)
+    dt = time.time() - t0
+
+    # Embeddings stay in the model's output dtype (fp16 heads → half the bytes
+    # stored); NumPy has no fp16 GEMM, so upcast to fp32 only for the compute —
+    # copy=False makes that free when the head already emits fp32.
+    E = batch_emb.astype(np.float32, copy=False)
+    norms = np.linalg.norm(E, axis=1, keepdims=True)
+    for sent, norm in zip(sentences, norms[:, 0]):
         print(f"  \"{sent[:50]}...\"")
-        print(f"    → dim={len(emb)}, norm={np.linalg.norm(emb):.4f}, {dt*1000:.0f}ms")
+        print(f"    → dim={E.shape[1]}, norm={norm:.4f}")
+    print(f"  Batch of {len(sentences)}: {dt*1000:.0f}ms")
 
-    # Cosine similarities
+    # Cosine similarities — L2-normalize once, then one matmul gives the full matrix.
+    # Zero vectors are left at zero so their similarity is 0.0 rather than NaN.
+    E = E / np.where(norms > 0, norms, 1)
+    S = E @ E.T
     print(f"\nCosine similarities:")
     for i in range(len(sentences)):
         for j in range(i+1, len(sentences)):
-            sim = cosine_similarity(embeddings[i], embeddings[j])
+            sim = float(S[i, j])
             print(f"  [{i}] vs [{j}]: {sim:.4f}  {'← similar!' if sim > 0.7 else ''}")
 
     # ─── 6. Reranker inference ──────────────────────────────────────────
@@ -158,20 +259,8 @@ def main():
     print(f"  Query: \"{query}\"")
     print(f"  Documents: {len(documents)}")
 
-    scores = []
-    for doc in documents:
-        # Reranker expects query + document as a pair
-        # Use [SEP] token between them
-        rr_tokenizer.no_padding()
-        rr_tokenizer.no_truncation()
-        encoded = rr_tokenizer.encode(query, doc)
-        ids = np.array([encoded.ids], dtype=np.int64)
-        mask = np.array([encoded.attention_mask], dtype=np.int64)
-
-        outputs = rr_session.run(None, {'input_ids': ids, 'attention_mask': mask})
-        # Reranker logits — higher = more relevant
-        score = float(outputs[0][0][0])
-        scores.append(score)
+    # Reranker expects query + document as a pair; all pairs go in one batch
+    scores = rerank(rr_tokenizer, rr_session, query, documents)
 
     # Sort by score
     ranked = sorted(enumerate(documents), key=lambda x: scores[x[0]], reverse=True)
@@ -11,14 +11,19 @@ Usage:
     python3 gguf-meta.py --classify model.gguf    # just: "llm" or "mmproj"
     python3 gguf-meta.py --quant model.gguf        # just: "Q4_0" etc.
 
+--classify and --quant answer from the filename when it is unambiguous
+(an "mmproj" name, or a quant tag like "-Q4_K_M") without reading the header.
+
 Output: JSON object with metadata for each file.
 """
 
 import struct
 import json
+import mmap
 import sys
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 # ─── GGUF file type enum → quantization name ────────────────────────────────
 
@@ -56,80 +61,133 @@ GGUF_VALUE_TYPES = {
 }
 
 
-def read_gguf_metadata(path, max_kv=300):
-    """Parse GGUF file header and return metadata dict."""
-    def read_string(f):
-        slen = struct.unpack('<Q', f.read(8))[0]
-        return f.read(slen).decode('utf-8', errors='replace')
+# Precompiled readers — Struct.unpack_from skips format-string parsing per call
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_VALUE_STRUCTS = {vtype: struct.Struct('<' + info[0])
+                  for vtype, info in GGUF_VALUE_TYPES.items() if info}
+
+
+class _HeaderTruncated(Exception):
+    """Header parsing ran past the end of a partial (prefix) buffer."""
+
 
-    def read_value(f, vtype, depth=0):
+def parse_gguf_header(buf, max_kv=300, complete=True):
+    """Parse a GGUF header from a bytes-like buffer holding the start of the file.
+
+    If `complete` is False the buffer is only a prefix of the file, and running
+    off its end raises _HeaderTruncated so the caller can retry with more bytes.
+    """
+    def read_string(buf, off):
+        slen = _U64.unpack_from(buf, off)[0]
+        off += 8
+        if off + slen > len(buf):
+            raise EOFError("string runs past end of buffer")
+        return str(buf[off:off + slen], 'utf-8', 'replace'), off + slen
+
+    def read_value(buf, off, vtype, depth=0):
         if vtype == 8:  # STRING
-            return read_string(f)
+            return read_string(buf, off)
         if vtype == 9:  # ARRAY
-            atype = struct.unpack('<I', f.read(4))[0]
-            alen = struct.unpack('<Q', f.read(8))[0]
+            atype = _U32.unpack_from(buf, off)[0]
+            alen = _U64.unpack_from(buf, off + 4)[0]
+            off += 12
             # For large arrays (e.g. tokenizer vocab), just return length
             if alen > 100:
                 # Skip the array data
                 if atype in GGUF_VALUE_TYPES and GGUF_VALUE_TYPES[atype]:
                     fmt, size = GGUF_VALUE_TYPES[atype]
-                    f.seek(alen * size, 1)
-                elif atype == 8:  # array of strings
+                    off += alen * size
+                elif atype == 8:  # array of strings — walk length prefixes
                     for _ in range(alen):
-                        slen = struct.unpack('<Q', f.read(8))[0]
-                        f.seek(slen, 1)
+                        off += 8 + _U64.unpack_from(buf, off)[0]
                 else:
                     # Can't skip unknown nested types
-                    return f"[array of {alen} items, type {atype}]"
-                return f"[{alen} items]"
-            return [read_value(f, atype, depth + 1) for _ in range(alen)]
-        info = GGUF_VALUE_TYPES.get(vtype)
-        if info:
-            fmt, size = info
-            return struct.unpack(f'<{fmt}', f.read(size))[0]
-        return None
+                    return f"[array of {alen} items, type {atype}]", off
+                return f"[{alen} items]", off
+            items = []
+            for _ in range(alen):
+                item, off = read_value(buf, off, atype, depth + 1)
+                items.append(item)
+            return items, off
+        st = _VALUE_STRUCTS.get(vtype)
+        if st:
+            return st.unpack_from(buf, off)[0], off + st.size
+        return None, off
+
+    magic = bytes(buf[:4])
+    if magic != b'GGUF':
+        return {"error": f"Not a GGUF file (magic: {magic!r})"}
+    if len(buf) < 24 and not complete:
+        raise _HeaderTruncated()
+
+    version = _U32.unpack_from(buf, 4)[0]
+    tensor_count = _U64.unpack_from(buf, 8)[0]
+    kv_count = _U64.unpack_from(buf, 16)[0]
+    off = 24
+
+    meta = {}
+    for _ in range(min(kv_count, max_kv)):
+        try:
+            key, off = read_string(buf, off)
+            vtype = _U32.unpack_from(buf, off)[0]
+            value, off = read_value(buf, off + 4, vtype)
+            meta[key] = value
+        except Exception:
+            if not complete:
+                raise _HeaderTruncated()
+            break
+
+    return {
+        "gguf_version": version,
+        "tensor_count": tensor_count,
+        "kv_count": kv_count,
+        "metadata": meta,
+    }
 
-    try:
-        with open(path, 'rb') as f:
-            magic = f.read(4)
-            if magic != b'GGUF':
-                return {"error": f"Not a GGUF file (magic: {magic!r})"}
 
-            version = struct.unpack('<I', f.read(4))[0]
-            tensor_count = struct.unpack('<Q', f.read(8))[0]
-            kv_count = struct.unpack('<Q', f.read(8))[0]
+def read_gguf_metadata(path, max_kv=300, max_header_bytes=4 * 1024 * 1024):
+    """Parse GGUF file header and return metadata dict.
 
-            meta = {}
-            for _ in range(min(kv_count, max_kv)):
+    Only a `max_header_bytes` prefix is read, so analyzing multi-GB files
+    doesn't trigger readahead over tensor data. Headers that don't fit are
+    retried with a 4× larger prefix, then with an mmap of the whole file.
+    """
+    try:
+        with open(path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            for limit in (max_header_bytes, max_header_bytes * 4):
+                f.seek(0)
+                buf = f.read(limit)
+                complete = len(buf) >= file_size
                 try:
-                    key = read_string(f)
-                    vtype = struct.unpack('<I', f.read(4))[0]
-                    value = read_value(f, vtype)
-                    meta[key] = value
-                except Exception:
-                    break
-
-            return {
-                "gguf_version": version,
-                "tensor_count": tensor_count,
-                "kv_count": kv_count,
-                "metadata": meta,
-            }
+                    return parse_gguf_header(buf, max_kv, complete)
+                except _HeaderTruncated:
+                    continue
+            # Oversized header — map the file; the OS pages in only what's touched
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return parse_gguf_header(mm, max_kv)
     except Exception as e:
         return {"error": str(e)}
 
 
 # ─── Higher-level analysis ───────────────────────────────────────────────────
 
+# Quantization tags in filenames, tried in order (compiled once at import)
+_QUANT_PATTERNS = [
+    re.compile(r'[_\-\.]((?:iq|q|f)\d+(?:_[a-zA-Z0-9]+)*)'),
+    re.compile(r'[_\-\.](fp16|fp32|bf16)'),
+]
+
+# "[N items]" placeholder left by read_gguf_metadata for skipped arrays
+_ITEMS_RE = re.compile(r'\[(\d+) items\]')
+
+
 def detect_quant_from_filename(filename):
     """Extract quantization type from GGUF filename."""
     basename = os.path.basename(filename).lower()
-    patterns = [
-        r'[_\-\.]((?:iq|q|f)\d+(?:_[a-zA-Z0-9]+)*)',
-        r'[_\-\.](fp16|fp32|bf16)',
-    ]
-    for pat in patterns:
-        m = re.search(pat, basename)
+    for pat in _QUANT_PATTERNS:
+        m = pat.search(basename)
         if m:
             raw = m.group(1).upper()
             # Normalize: FP16 → F16
@@ -213,7 +271,7 @@ def analyze_gguf(filepath):
     tokens = meta.get("tokenizer.ggml.tokens")
     if isinstance(tokens, str) and tokens.startswith('['):
         # Was truncated to "[N items]"
-        m = re.match(r'\[(\d+) items\]', tokens)
+        m = _ITEMS_RE.match(tokens)
         if m:
             known_fields["vocab_size"] = int(m.group(1))
     elif isinstance(tokens, list):
@@ -260,15 +318,34 @@ def main():
         print("Error: no GGUF files specified", file=sys.stderr)
         sys.exit(1)
 
+    # Header reads are blocking I/O (GIL released) — analyze files in parallel,
+    # then assemble results in argument order.
+    found = [fp for fp in args if os.path.isfile(fp)]
+    analyses = {}
+
+    # Fast path: answer --classify / --quant from the filename alone when it
+    # is unambiguous, skipping the header read entirely.
+    for fp in found:
+        if mode == 'classify' and 'mmproj' in os.path.basename(fp).lower():
+            analyses[fp] = {"classification": "mmproj"}
+        elif mode == 'quant':
+            quant = detect_quant_from_filename(fp)
+            if quant:
+                analyses[fp] = {"quantization": quant}
+
+    to_parse = [fp for fp in found if fp not in analyses]
+    if to_parse:
+        with ThreadPoolExecutor(max_workers=min(8, len(to_parse))) as ex:
+            analyses.update(zip(to_parse, ex.map(analyze_gguf, to_parse)))
+
     results = {}
     for filepath in args:
-        if not os.path.isfile(filepath):
+        if filepath not in analyses:
             results[filepath] = {"error": f"File not found: {filepath}"}
             continue
 
-        analysis = analyze_gguf(filepath)
         basename = os.path.basename(filepath)
-        results[basename] = analysis
+        results[basename] = analyses[filepath]
 
     if mode == 'classify':
         for name, info in results.items():
@@ -33,86 +33,296 @@ Options:
   --list             List available manifests and exit
   --verify           Verify SHA256 checksums after download (default: on)
   --no-verify        Skip SHA256 verification
-  --concurrency N    Parallel downloads (default: 4)
+  --concurrency N    Parallel downloads (default: 4; raise to 16-32 for
+                     many small files over a high-latency link)
+  --local-workers N  Parallel reassembly for local sources (default: min(4, CPUs))
+
+If urllib3 is installed (pip install urllib3), CDN downloads share one
+keep-alive connection pool instead of opening a new connection per file
+and shard; with httpx and h2 installed (pip install 'httpx[http2]') they
+are multiplexed over HTTP/2 where the CDN supports it. Without either the
+stdlib urllib is used. Likewise, orjson (if
+installed) speeds up parsing and writing large filemaps, and with ijson
+installed, -m downloads stream-parse the filemap and keep only the entries
+the selected manifests need. Entries carrying a "blake3" digest are checked
+with the multi-core blake3 package when it is installed.
 """
 
 import argparse
 import hashlib
 import json
+import mmap
 import os
 import shutil
 import sys
+import time
+import urllib.error
 import urllib.request
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import accumulate
 from pathlib import Path
 
+try:
+    import urllib3
+    from urllib3.util.retry import Retry
+except ImportError:
+    urllib3 = None
+
+try:
+    import httpx
+    import h2  # required by httpx for HTTP/2
+except ImportError:
+    httpx = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from blake3 import blake3
+except ImportError:
+    blake3 = None
+
+PROGRESS_INTERVAL = 0.25  # seconds between progress flushes
+COPY_BUFSIZE = 1 << 20    # read/write granularity for streamed copies (vs 16 KiB default)
+CONNECT_TIMEOUT = 30      # seconds to establish a connection
+READ_TIMEOUT = 300        # seconds a stalled response may go without sending data
+
+# Shared keep-alive connection pool, set up by init_pool():
+# httpx.Client (HTTP/2), urllib3.PoolManager, or None → plain urllib
+POOL = None
+
+
+def init_pool(maxsize):
+    """Create the shared connection pool so sockets (and TLS sessions) are
+    reused across files and shards instead of reconnecting per request."""
+    global POOL
+    if httpx is not None:
+        # One HTTP/2 connection per host carries all workers' requests as
+        # concurrent streams; identity encoding keeps byte ranges resumable.
+        # File and shard workers together can outnumber the connections on an
+        # HTTP/1.1 CDN, so waiting for one is unbounded (pool=None), as with
+        # urllib3's block=True, rather than failing with PoolTimeout
+        POOL = httpx.Client(
+            transport=httpx.HTTPTransport(
+                http2=True, retries=3, limits=httpx.Limits(max_connections=maxsize)),
+            headers={'Accept-Encoding': 'identity'},
+            follow_redirects=True,
+            timeout=httpx.Timeout(CONNECT_TIMEOUT, read=READ_TIMEOUT, pool=None))
+    elif urllib3 is not None:
+        POOL = urllib3.PoolManager(
+            num_pools=4, maxsize=maxsize, block=True,
+            timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+            retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504]))
+
+
+@contextmanager
+def open_url(url, headers=None):
+    """GET a URL and yield a readable response, via the pool when available.
+
+    HTTP error statuses raise urllib.error.HTTPError on both paths.
+    """
+    if POOL is None:
+        req = urllib.request.Request(url, headers=headers or {})
+        with urllib.request.urlopen(req, timeout=READ_TIMEOUT) as resp:
+            yield resp
+        return
+    if httpx is not None and isinstance(POOL, httpx.Client):
+        with POOL.stream('GET', url, headers=headers) as resp:
+            if resp.status_code >= 400:
+                raise urllib.error.HTTPError(
+                    url, resp.status_code, resp.reason_phrase, resp.headers, None)
+            yield _StreamReader(resp)
+        return
+    resp = POOL.request('GET', url, headers=headers, preload_content=False)
+    try:
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+        yield resp
+    except BaseException:
+        resp.close()
+        raise
+    else:
+        resp.release_conn()
+
+
+class _StreamReader:
+    """File-like read(n) over an httpx streaming response."""
+
+    def __init__(self, resp):
+        self.status = resp.status_code
+        self.headers = resp.headers
+        self._chunks = resp.iter_bytes(COPY_BUFSIZE)
+        self._buf = b''
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            data, self._buf = self._buf + b''.join(self._chunks), b''
+            return data
+        while len(self._buf) < n:
+            chunk = next(self._chunks, b'')
+            if not chunk:
+                break
+            self._buf += chunk
+        data, self._buf = self._buf[:n], self._buf[n:]
+        return data
+
 
 def is_url(s):
     return s.startswith('http://') or s.startswith('https://')
 
 
+def _loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+
 def fetch_json(url):
-    with urllib.request.urlopen(url) as resp:
-        return json.loads(resp.read())
+    with open_url(url) as resp:
+        return _loads(resp.read())
 
 
 def read_json(path):
-    with open(path) as f:
-        return json.load(f)
+    with open(path, 'rb') as f:
+        return _loads(f.read())
 
 
-def load_filemap(source):
-    """Load filemap.json from a URL or local path."""
+def locate_filemap(source):
+    """Resolve a source to (filemap.json URL or path, base URL or directory)."""
     if is_url(source):
         # If source is a direct URL to filemap.json
         if source.endswith('/filemap.json'):
-            base_url = source.rsplit('/', 1)[0]
-            return fetch_json(source), base_url
+            return source, source.rsplit('/', 1)[0]
         # If source is a base URL, append filemap.json
         base_url = source.rstrip('/')
-        return fetch_json(base_url + '/filemap.json'), base_url
+        return base_url + '/filemap.json', base_url
     else:
         # Local path
         local = Path(source)
         if local.is_file() and local.name == 'filemap.json':
-            return read_json(local), str(local.parent)
+            return local, str(local.parent)
         elif local.is_dir():
             fmap = local / 'filemap.json'
             if not fmap.exists():
                 sys.exit(f"No filemap.json found in {local}")
-            return read_json(fmap), str(local)
+            return fmap, str(local)
         else:
             sys.exit(f"Cannot find filemap at: {source}")
 
 
+def load_filemap(source):
+    """Load filemap.json from a URL or local path."""
+    location, base = locate_filemap(source)
+    if is_url(base):
+        return fetch_json(location), base
+    return read_json(location), base
+
+
+def stream_filemap(path, manifests):
+    """Parse a local filemap.json keeping only the entries `manifests` need.
+
+    Requires ijson. Returns (filemap, total file count); peak memory scales
+    with the kept entries rather than the whole filemap.
+    """
+    with open(path, 'rb') as f:
+        version = next(ijson.items(f, 'version'), '?')
+        f.seek(0)
+        available = next(ijson.items(f, 'manifests', use_float=True), {})
+        wanted = set()
+        for m in manifests:
+            wanted.update(available.get(m, {}).get('files', ()))
+        f.seek(0)
+        files, total = {}, 0
+        for vp, entry in ijson.kvitems(f, 'files', use_float=True):
+            total += 1
+            if vp in wanted:
+                files[vp] = entry
+    return {'version': version, 'manifests': available, 'files': files}, total
+
+
 def get_file_list(filemap, manifests):
     """Get list of virtual paths to download."""
-    all_files = set(filemap.get('files', {}).keys())
-
     if not manifests:
-        return sorted(all_files)
+        return sorted(filemap.get('files', {}))
 
-    result = set()
     available = filemap.get('manifests', {})
     for m in manifests:
         if m not in available:
             print(f"  ⚠ Manifest '{m}' not found. Available: {list(available.keys())}")
-            continue
-        manifest_files = available[m].get('files', [])
-        result.update(manifest_files)
-    return sorted(result)
+    # Manifests overlap heavily (shared config/tokenizer files); union dedupes
+    return sorted(set().union(*(available[m].get('files', ())
+                                for m in manifests if m in available)))
+
+
+def _file_size(path):
+    """Size of `path` in bytes, or -1 if it doesn't exist (a single stat call)."""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return -1
+
+
+def _fetch_into(url, f, start, have=0, h=None):
+    """Write the body of `url` into open file `f` at offset `start`.
+
+    When `have` bytes are already in place, asks for the rest with a Range
+    request; falls back to a full fetch if the server does not honour it.
+    If a hasher `h` is given (already covering everything before `start`),
+    the kept prefix is hashed from disk and new bytes are hashed in flight.
+    """
+    headers = {'Range': f'bytes={have}-'} if have else None
+    try:
+        with open_url(url, headers) as resp:
+            if have and not (resp.status == 206 and
+                             resp.headers.get('Content-Range', '').startswith(f'bytes {have}-')):
+                have = 0
+            if h is not None and have:
+                _hash_region(f, h, start, have)
+            f.seek(start + have)
+            f.truncate()
+            while chunk := resp.read(COPY_BUFSIZE):
+                f.write(chunk)
+                if h is not None:
+                    h.update(chunk)
+    except urllib.error.HTTPError as e:
+        if not have or e.code != 416:
+            raise
+        _fetch_into(url, f, start, h=h)
+
+
+def _hash_region(f, h, start, length):
+    """Feed `length` bytes of `f` starting at `start` into hasher `h`.
+
+    Hashes a slice of an mmap of the file, so OpenSSL reads the page cache
+    directly in one update() instead of a chunk loop of fresh bytes objects.
+    """
+    if length <= 0 or os.fstat(f.fileno()).st_size <= start:
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+        h.update(view[start:start + length])
 
 
 def download_file(url, dest, expected_size=None):
-    """Download a single file from URL."""
+    """Download a single file from URL, resuming a partial one.
+
+    Returns (status, sha256 hexdigest), the digest being None when cached.
+    """
     dest.parent.mkdir(parents=True, exist_ok=True)
-    # Resume support: skip if already exists with correct size
-    if dest.exists() and expected_size and dest.stat().st_size == expected_size:
-        return 'cached'
-    with urllib.request.urlopen(url) as resp:
-        with open(dest, 'wb') as f:
-            shutil.copyfileobj(resp, f)
-    return 'downloaded'
+    have = max(_file_size(dest), 0)
+    if expected_size and have == expected_size:
+        return 'cached', None
+    if not expected_size or have > expected_size:
+        have = 0
+    h = hashlib.sha256()
+    with open(dest, 'r+b' if have else 'wb') as f:
+        _fetch_into(url, f, 0, have, h)
+    return 'downloaded', h.hexdigest()
 
 
 def _cdn_name(entry):
@@ -125,10 +335,54 @@ def _shard_name(shard):
     return shard.get('file') or shard.get('cdn_file') or shard.get('cdn')
 
 
+def _fadvise(fd, *advice):
+    """Give posix_fadvise access hints (e.g. 'SEQUENTIAL') where supported."""
+    if hasattr(os, 'posix_fadvise'):
+        for name in advice:
+            os.posix_fadvise(fd, 0, 0, getattr(os, f'POSIX_FADV_{name}'))
+
+
+def _append_file(sf, f):
+    """Append open file `sf` to `f`.
+
+    Copies in-kernel with sendfile on Linux; elsewhere (e.g. macOS, where
+    sendfile only targets sockets) maps the shard and writes it in one call.
+    """
+    size = os.fstat(sf.fileno()).st_size
+    if not size:
+        return
+    if not sys.platform.startswith('linux'):
+        with mmap.mmap(sf.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            f.write(mm)
+        return
+    f.flush()
+    start = f.tell()
+    offset = 0
+    while offset < size:
+        sent = os.sendfile(f.fileno(), sf.fileno(), offset, size - offset)
+        if not sent:
+            break
+        offset += sent
+    f.seek(start + offset)
+
+
+def _preallocate(f, size):
+    """Reserve `size` bytes for `f` up front so the filesystem can allocate
+    it in few extents rather than growing it shard by shard."""
+    if not size:
+        return
+    try:
+        os.posix_fallocate(f.fileno(), 0, size)
+    except (AttributeError, OSError):  # non-Linux, or unsupported filesystem
+        f.truncate(size)
+
+
 def reassemble_local(base_path, entry, dest):
     """Reassemble a file from local shards."""
     dest.parent.mkdir(parents=True, exist_ok=True)
-    if dest.exists() and dest.stat().st_size == entry['size']:
+    if _file_size(dest) == entry['size']:
         return 'cached'
 
     shards = entry.get('shards')
@@ -136,43 +390,112 @@ def reassemble_local(base_path, entry, dest):
         # Single file, direct copy
         cdn = _cdn_name(entry)
         if cdn:
-            shutil.copy2(Path(base_path) / cdn, dest)
+            shutil.copyfile(os.path.join(base_path, cdn), dest)
         else:
             return 'skip'
     else:
-        # Reassemble shards
-        with open(dest, 'wb') as f:
+        # Reassemble shards into a preallocated .part file, renamed when
+        # complete so an interrupted run never leaves a full-size dest behind
+        part = dest.with_name(dest.name + '.part')
+        with open(part, 'wb') as f:
+            _preallocate(f, entry['size'])
             for shard in shards:
-                shard_path = Path(base_path) / _shard_name(shard)
-                with open(shard_path, 'rb') as sf:
-                    shutil.copyfileobj(sf, f)
+                with open(os.path.join(base_path, _shard_name(shard)), 'rb') as sf:
+                    _fadvise(sf.fileno(), 'SEQUENTIAL', 'WILLNEED')
+                    _append_file(sf, f)
+                    # Read once; drop it so it doesn't evict the next shard
+                    _fadvise(sf.fileno(), 'DONTNEED')
+            f.truncate()
+        os.replace(part, dest)
     return 'assembled'
 
 
-def download_from_cdn(base_url, entry, dest):
-    """Download a file from CDN, reassembling shards if needed."""
+def _download_shard(url, part, offset, shard):
+    """Fetch one shard into its byte range of `part`, checking its sha256 if known."""
+    h = hashlib.sha256()
+    with open_url(url) as resp, open(part, 'r+b') as f:
+        f.seek(offset)
+        while chunk := resp.read(COPY_BUFSIZE):
+            f.write(chunk)
+            h.update(chunk)
+        written = f.tell() - offset
+    if written != shard['size']:
+        raise ValueError(f"{_shard_name(shard)}: got {written} bytes, expected {shard['size']}")
+    if shard.get('sha256') and h.hexdigest() != shard['sha256']:
+        raise ValueError(f"{_shard_name(shard)}: SHA256 mismatch")
+
+
+def _shard_on_disk(part, offset, shard):
+    """Check whether `part` already holds a shard's bytes (left by an interrupted run)."""
+    if not shard.get('sha256'):
+        return False
+    h = hashlib.sha256()
+    with open(part, 'rb') as f:
+        _hash_region(f, h, offset, shard['size'])
+    return h.hexdigest() == shard['sha256']
+
+
+def download_from_cdn(base_url, entry, dest, shard_pool=None):
+    """Download a file from CDN, fetching its shards on `shard_pool`.
+
+    The executor is shared by all files, so shard workers stay bounded by its
+    size however many files are in flight; without one, shards go one by one.
+
+    Returns (status, sha256 hexdigest), the digest being None when cached or
+    when it still needs checking. A sharded file whose shards all carry a
+    sha256 is checked shard by shard, so it reports the filemap digest.
+    """
     dest.parent.mkdir(parents=True, exist_ok=True)
-    if dest.exists() and dest.stat().st_size == entry['size']:
-        return 'cached'
+    if _file_size(dest) == entry['size']:
+        return 'cached', None
 
     shards = entry.get('shards')
     if not shards:
         cdn = _cdn_name(entry)
-        download_file(f"{base_url}/{cdn}", dest, entry['size'])
+        return download_file(f"{base_url}/{cdn}", dest, entry['size'])
+
+    # Shards land at their offsets in a preallocated .part file; on resume,
+    # shards whose bytes already hash correctly are kept
+    part = dest.with_name(dest.name + '.part')
+    resuming = _file_size(part) == entry['size']
+    if not resuming:
+        with open(part, 'wb') as f:
+            _preallocate(f, entry['size'])
+    offsets = accumulate((shard['size'] for shard in shards), initial=0)
+    todo = [(shard, offset) for shard, offset in zip(shards, offsets)
+            if not (resuming and _shard_on_disk(part, offset, shard))]
+    if shard_pool is None:
+        for shard, offset in todo:
+            _download_shard(f"{base_url}/{_shard_name(shard)}", part, offset, shard)
     else:
-        with open(dest, 'wb') as f:
-            for shard in shards:
-                url = f"{base_url}/{_shard_name(shard)}"
-                with urllib.request.urlopen(url) as resp:
-                    shutil.copyfileobj(resp, f)
-    return 'downloaded'
+        futures = [shard_pool.submit(_download_shard, f"{base_url}/{_shard_name(shard)}",
+                                     part, offset, shard)
+                   for shard, offset in todo]
+        for future in futures:
+            future.result()
+    os.replace(part, dest)
+    checked = all(shard.get('sha256') for shard in shards)
+    return 'downloaded', entry.get('sha256') if checked else None
 
 
 def verify_sha256(filepath, expected):
-    h = hashlib.sha256()
     with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(1 << 20), b''):
-            h.update(chunk)
+        _fadvise(f.fileno(), 'SEQUENTIAL', 'WILLNEED')
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest() == expected
+        h = hashlib.sha256()
+        if os.fstat(f.fileno()).st_size:  # mmap can't map an empty file
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                h.update(mm)
+        return h.hexdigest() == expected
+
+
+def verify_blake3(filepath, expected):
+    """Check a BLAKE3 digest, hashing the mmapped file across all cores."""
+    h = blake3(max_threads=blake3.AUTO)
+    h.update_mmap(filepath)
     return h.hexdigest() == expected
 
 
@@ -193,15 +516,32 @@ def main():
         help='Skip SHA256 verification')
     p.add_argument('--concurrency', type=int, default=4,
         help='Parallel downloads for CDN sources (default: 4)')
+    p.add_argument('--local-workers', type=int, default=min(4, os.cpu_count() or 1),
+        help='Parallel reassembly for local sources (default: min(4, CPUs))')
     args = p.parse_args()
+    init_pool(args.concurrency)
 
     # Load filemap
     print(f"Loading filemap from: {args.source}")
-    filemap, base = load_filemap(args.source)
+    out_dir = Path(args.output)
+    streamed = bool(ijson and args.manifest and not args.list)
+    if streamed:
+        # A remote filemap is saved to the output dir as-is, then parsed there
+        location, base = locate_filemap(args.source)
+        if is_url(base):
+            out_dir.mkdir(parents=True, exist_ok=True)
+            saved = out_dir / 'filemap.json'
+            with open_url(location) as resp, open(saved, 'wb') as f:
+                shutil.copyfileobj(resp, f, COPY_BUFSIZE)
+            location = saved
+        filemap, total_files = stream_filemap(location, args.manifest)
+    else:
+        filemap, base = load_filemap(args.source)
+        total_files = len(filemap.get('files', {}))
     is_remote = is_url(base)
 
+    files = filemap.get('files', {})
     version = filemap.get('version', '?')
-    total_files = len(filemap.get('files', {}))
     manifests = filemap.get('manifests', {})
     print(f"  Filemap v{version}: {total_files} files, {len(manifests)} manifest(s)")
 
@@ -210,59 +550,78 @@ def main():
         if not manifests:
             print("  (no manifests defined)")
         for name, mf in manifests.items():
-            files = mf.get('files', [])
-            total = sum(filemap['files'][f]['size'] for f in files if f in filemap['files'])
-            print(f"  • {name}: {len(files)} files, {total / 1048576:.1f} MB")
+            mf_files = mf.get('files', [])
+            total = sum(files[f]['size'] for f in mf_files if f in files)
+            print(f"  • {name}: {len(mf_files)} files, {total / 1048576:.1f} MB")
         return
 
     # Determine files to download
     file_list = get_file_list(filemap, args.manifest)
-    if not file_list:
+    entries = [(vp, files[vp]) for vp in file_list if vp in files]
+    if not entries:
         print("No files to download.")
         return
 
-    total_size = sum(filemap['files'].get(f, {}).get('size', 0) for f in file_list)
+    total_size = sum(entry.get('size', 0) for _, entry in entries)
     label = ', '.join(args.manifest) if args.manifest else 'all'
-    print(f"  Downloading [{label}]: {len(file_list)} files, {total_size / 1048576:.1f} MB")
+    print(f"  Downloading [{label}]: {len(entries)} files, {total_size / 1048576:.1f} MB")
 
-    out_dir = Path(args.output)
     out_dir.mkdir(parents=True, exist_ok=True)
 
     # Download/assemble files
     stats = {'cached': 0, 'downloaded': 0, 'assembled': 0, 'failed': 0, 'verified': 0}
 
-    def process_file(vp):
-        entry = filemap['files'].get(vp)
-        if not entry:
-            return vp, 'skip'
+    digests = {}  # vp → sha256 computed while downloading
+
+    def process_file(vp, entry):
         dest = out_dir / vp
         try:
             if is_remote:
-                status = download_from_cdn(base, entry, dest)
+                status, digests[vp] = download_from_cdn(base, entry, dest, shard_pool)
             else:
                 status = reassemble_local(base, entry, dest)
             return vp, status
         except Exception as e:
             return vp, f'error: {e}'
 
-    workers = args.concurrency if is_remote else 1
-    with ThreadPoolExecutor(max_workers=workers) as pool:
-        futures = {pool.submit(process_file, vp): vp for vp in file_list}
+    # Local reassembly is sendfile/mmap I/O that releases the GIL, so threads
+    # overlap it across files; the cap keeps NVMe queues from thrashing
+    workers = args.concurrency if is_remote else args.local_workers
+    lines = []  # progress lines, flushed at most every PROGRESS_INTERVAL
+    last_flush = time.monotonic()
+    # File tasks only wait on their shards, so shards get a separate pool (sharing
+    # the file pool could deadlock); one pool for all files keeps the total
+    # shard workers at --concurrency rather than --concurrency per file
+    with ThreadPoolExecutor(max_workers=args.concurrency) as shard_pool, \
+            ThreadPoolExecutor(max_workers=workers) as pool:
+        # Largest first, so one big file doesn't start last and set the wall time
+        by_size = sorted(entries, key=lambda e: -e[1].get('size', 0))
+        futures = {pool.submit(process_file, vp, entry): entry for vp, entry in by_size}
         for i, future in enumerate(as_completed(futures), 1):
             vp, status = future.result()
             if status.startswith('error'):
                 stats['failed'] += 1
-                print(f"  ✗ {vp}: {status}")
+                lines.append(f"  ✗ {vp}: {status}")
             else:
                 stats[status] = stats.get(status, 0) + 1
-                size_mb = filemap['files'][vp]['size'] / 1048576
-                print(f"  [{i}/{len(file_list)}] {vp} ({size_mb:.1f} MB) — {status}")
+                size_mb = futures[future]['size'] / 1048576
+                lines.append(f"  [{i}/{len(entries)}] {vp} ({size_mb:.1f} MB) — {status}")
+            now = time.monotonic()
+            if now - last_flush >= PROGRESS_INTERVAL or i == len(futures):
+                print('\n'.join(lines), flush=True)
+                lines.clear()
+                last_flush = now
 
     # Copy filemap.json
     filemap_dest = out_dir / 'filemap.json'
     if is_remote:
-        with open(filemap_dest, 'w') as f:
-            json.dump(filemap, f, indent=2)
+        if streamed:
+            pass  # already saved verbatim before parsing
+        elif orjson:
+            filemap_dest.write_bytes(orjson.dumps(filemap, option=orjson.OPT_INDENT_2))
+        else:
+            with open(filemap_dest, 'w') as f:
+                json.dump(filemap, f, indent=2)
     else:
         src_filemap = Path(base) / 'filemap.json'
         shutil.copy2(src_filemap, filemap_dest)
@@ -271,15 +630,33 @@ def main():
     # Verify
     if args.verify:
         print("\nVerifying SHA256 checksums...")
-        for vp in file_list:
-            entry = filemap['files'].get(vp, {})
+        tasks = []
+        for vp, entry in entries:
             sha = entry.get('sha256')
+            b3 = entry.get('blake3') if blake3 else None
             dest = out_dir / vp
-            if sha and dest.exists():
-                if verify_sha256(dest, sha):
+            # Files hashed in flight are known to exist; skip their stat
+            if (sha or b3) and (digests.get(vp) or _file_size(dest) >= 0):
+                tasks.append((vp, dest, sha, b3))
+
+        def check(task):
+            """Return the name of the digest that failed, or None if it matched."""
+            vp, dest, sha, b3 = task
+            # Downloads were hashed in flight; only re-read cached/assembled files
+            if sha and digests.get(vp):
+                return None if digests[vp] == sha else 'SHA256'
+            if b3:
+                return None if verify_blake3(dest, b3) else 'BLAKE3'
+            return None if verify_sha256(dest, sha) else 'SHA256'
+
+        # file_digest releases the GIL, so threads hash files in parallel
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+            results = pool.map(check, tasks)
+            for (vp, _, _, _), failed in zip(tasks, results):
+                if failed is None:
                     stats['verified'] += 1
                 else:
-                    print(f"  ✗ SHA256 MISMATCH: {vp}")
+                    print(f"  ✗ {failed} MISMATCH: {vp}")
                     stats['failed'] += 1
 
     # Summary
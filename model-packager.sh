@@ -1014,7 +1014,7 @@ if has_onnx_meta and has_onnx_files:
     # But we also want to pass the virtual path list for better detection.
     try:
         result = subprocess.run(
-            [sys.executable, onnx_meta_py, '--json', output_dir],
+            [sys.executable, onnx_meta_py, '--json', '--compact', output_dir],
             capture_output=True, text=True, timeout=10
         )
         if result.returncode == 0:
@@ -13,10 +13,12 @@ Usage:
     python3 onnx-meta.py /path/to/model/dir
     python3 onnx-meta.py --classify /path/to/model/dir    # just task type
     python3 onnx-meta.py --json /path/to/model/dir         # full JSON
+    python3 onnx-meta.py --json --compact /path/to/model/dir   # one-line JSON
 
 Output: JSON object with model metadata including classification.
 """
 
+import functools
 import json
 import sys
 import os
@@ -25,7 +27,7 @@ import re
 # ─── Architecture suffix → task type mapping ─────────────────────────────────
 # Tier 1: High-confidence direct mappings from architecture class name suffixes.
 # These suffixes are standardized across the HuggingFace transformers library.
-# The key is checked with str.endswith() against architectures[0].
+# The key is matched as a suffix of architectures[0] (longest match wins).
 
 ARCHITECTURE_TASK_MAP = {
     # Text generation
@@ -76,6 +78,33 @@ ARCHITECTURE_TASK_MAP = {
     'ForZeroShotImageClassification': 'zero-shot-image-classification',
 }
 
+
+def _build_suffix_trie(suffix_map):
+    """Trie over reversed suffixes; '$' marks a node where a suffix ends."""
+    trie = {}
+    for suffix, task in suffix_map.items():
+        node = trie
+        for c in reversed(suffix):
+            node = node.setdefault(c, {})
+        node['$'] = task
+    return trie
+
+
+ARCHITECTURE_SUFFIX_TRIE = _build_suffix_trie(ARCHITECTURE_TASK_MAP)
+
+
+@functools.lru_cache(maxsize=256)
+def match_architecture_suffix(arch):
+    """Task for the longest ARCHITECTURE_TASK_MAP suffix of `arch`, or None."""
+    node = ARCHITECTURE_SUFFIX_TRIE
+    task = None
+    for c in reversed(arch):
+        node = node.get(c)
+        if node is None:
+            break
+        task = node.get('$', task)
+    return task
+
 # ─── Known reranker / cross-encoder name patterns ────────────────────────────
 
 RERANKER_NAME_PATTERNS = [
@@ -83,6 +112,8 @@ RERANKER_NAME_PATTERNS = [
     r'bge[\-_]reranker', r'jina[\-_]reranker', r'mxbai[\-_]rerank',
     r'cohere[\-_]rerank',
 ]
+# One alternation, so a name is scanned once rather than once per pattern
+RERANKER_UNION_RE = re.compile('|'.join(f'(?:{p})' for p in RERANKER_NAME_PATTERNS), re.IGNORECASE)
 
 # ─── Known embedding model name patterns ─────────────────────────────────────
 
@@ -92,21 +123,25 @@ EMBEDDING_NAME_PATTERNS = [
     r'nomic[\-_]embed', r'jina[\-_]embed', r'instructor',
     r'arctic[\-_]embed', r'stella', r'mxbai[\-_]embed',
 ]
+EMBEDDING_UNION_RE = re.compile('|'.join(f'(?:{p})' for p in EMBEDDING_NAME_PATTERNS), re.IGNORECASE)
 
 # ─── id2label patterns for zero-shot NLI models ─────────────────────────────
 
-NLI_LABELS = {'entailment', 'contradiction', 'neutral',
-              'ENTAILMENT', 'CONTRADICTION', 'NEUTRAL'}
+# Compared against lowercased labels
+NLI_LABELS = frozenset({'entailment', 'contradiction', 'neutral'})
 
 
 def is_generic_label(label):
     """Check if a label is a generic/default HuggingFace label (not meaningful)."""
     if not label:
         return True
-    # Patterns: LABEL_0, LABEL_1, Label_0, label_0, etc.
-    if re.match(r'^[Ll][Aa][Bb][Ee][Ll][_\-]?\d+$', label):
-        return True
-    return False
+    # Patterns: LABEL_0, LABEL_1, Label_0, label-0, label0, etc.
+    if label[:5].lower() != 'label':
+        return False
+    rest = label[5:]
+    if rest[:1] in ('_', '-'):
+        rest = rest[1:]
+    return rest.isdecimal()
 
 
 def classify_sequence_model(config, file_list, model_name):
@@ -118,30 +153,29 @@ def classify_sequence_model(config, file_list, model_name):
     """
     id2label = config.get('id2label', {})
     num_labels = config.get('num_labels', len(id2label) if id2label else 0)
-    label_values = set(str(v) for v in id2label.values()) if id2label else set()
 
-    # ── Check for zero-shot NLI model ──
-    if label_values & NLI_LABELS:
-        return 'zero-shot-classification'
-
-    # ── Check for reranker by label pattern ──
+    # ── One pass over the labels: zero-shot NLI model? all generic? ──
     # Rerankers typically have 1 label or only generic labels
-    all_generic = all(is_generic_label(str(v)) for v in id2label.values()) if id2label else True
+    all_generic = True
+    for v in (id2label.values() if id2label else ()):
+        label = str(v)
+        if label.lower() in NLI_LABELS:
+            return 'zero-shot-classification'
+        if all_generic and not is_generic_label(label):
+            all_generic = False
 
     if all_generic and num_labels <= 1:
         return 'reranker'
 
     # ── Check model name for reranker indicators ──
     name_lower = model_name.lower()
-    for pat in RERANKER_NAME_PATTERNS:
-        if re.search(pat, name_lower):
-            return 'reranker'
+    if RERANKER_UNION_RE.search(name_lower):
+        return 'reranker'
 
     # ── Check model name for reranker in _name_or_path ──
-    name_or_path = config.get('_name_or_path', '')
-    for pat in RERANKER_NAME_PATTERNS:
-        if re.search(pat, name_or_path.lower()):
-            return 'reranker'
+    name_or_path = config.get('_name_or_path', '').lower()
+    if RERANKER_UNION_RE.search(name_or_path):
+        return 'reranker'
 
     # ── Default: if all labels are generic, lean toward reranker ──
     if all_generic:
@@ -151,22 +185,33 @@ def classify_sequence_model(config, file_list, model_name):
     return 'text-classification'
 
 
-def classify_base_model(config, file_list, model_name):
+# sentence-transformers ecosystem files
+ST_FILES = frozenset({'modules.json', 'sentence_bert_config.json',
+                      'config_sentence_transformers.json'})
+
+
+def top_level_names(file_list):
+    """First path component of every entry: top-level files and directories."""
+    return {f.partition('/')[0] for f in file_list}
+
+
+def classify_base_model(config, file_list, model_name, top_names=None):
     """
     Classify a base model (no For* task head) as:
       - 'embedding'           (sentence embedding / bi-encoder)
       - 'feature-extraction'  (generic backbone)
+
+    top_names is top_level_names(file_list), if the caller already has it.
     """
     # ── Strong signals for embedding model ──
 
-    # sentence-transformers ecosystem files
-    st_files = {'modules.json', 'sentence_bert_config.json',
-                'config_sentence_transformers.json'}
-    if st_files & set(file_list):
+    if not ST_FILES.isdisjoint(file_list):
         return 'embedding'
 
     # Pooling directory (sentence-transformers convention)
-    if any(f.startswith('1_Pooling/') or f == '1_Pooling' for f in file_list):
+    if top_names is None:
+        top_names = top_level_names(file_list)
+    if '1_Pooling' in top_names:
         return 'embedding'
 
     # Bidirectional attention flag (e.g. embeddinggemma)
@@ -178,15 +223,14 @@ def classify_base_model(config, file_list, model_name):
     name_or_path = config.get('_name_or_path', '').lower()
     combined = name_lower + ' ' + name_or_path
 
-    for pat in EMBEDDING_NAME_PATTERNS:
-        if re.search(pat, combined):
-            return 'embedding'
+    if EMBEDDING_UNION_RE.search(combined):
+        return 'embedding'
 
     # ── Default: feature extraction (generic backbone) ──
     return 'feature-extraction'
 
 
-def detect_task_type(config, file_list, model_name):
+def detect_task_type(config, file_list, model_name, top_names=None):
     """
     Main classification entry point.
     Returns a task type string.
@@ -194,19 +238,19 @@ def detect_task_type(config, file_list, model_name):
     architectures = config.get('architectures', [])
     if not architectures:
         # No architecture info → use heuristics
-        return classify_base_model(config, file_list, model_name)
+        return classify_base_model(config, file_list, model_name, top_names)
 
     arch = architectures[0]
 
     # ── Check Tier 1: architecture suffix map ──
-    for suffix, task in ARCHITECTURE_TASK_MAP.items():
-        if arch.endswith(suffix):
-            if task == 'sequence-classification':
-                return classify_sequence_model(config, file_list, model_name)
-            return task
+    task = match_architecture_suffix(arch)
+    if task == 'sequence-classification':
+        return classify_sequence_model(config, file_list, model_name)
+    if task:
+        return task
 
     # ── No suffix matched → base model ──
-    return classify_base_model(config, file_list, model_name)
+    return classify_base_model(config, file_list, model_name, top_names)
 
 
 # ─── Transformers.js AutoModel class recommendation ─────────────────────────
@@ -240,14 +284,22 @@ def extract_onnx_variants(file_list):
     Returns list of {name, path, has_external_data} dicts.
     """
     variants = []
-    onnx_files = sorted(f for f in file_list if f.endswith('.onnx'))
-    onnx_data_files = set(f for f in file_list if f.endswith('.onnx_data'))
+    # One pass over the (possibly long, shard-heavy) listing for both kinds
+    onnx_files = []
+    onnx_data_files = set()
+    for f in file_list:
+        if f.endswith('.onnx'):
+            onnx_files.append(f)
+        elif f.endswith('.onnx_data'):
+            onnx_data_files.add(f)
+    onnx_files.sort()
 
     for onnx_file in onnx_files:
-        basename = os.path.basename(onnx_file)
-        stem = re.sub(r'\.onnx$', '', basename)
+        stem = onnx_file.rpartition('/')[2][:-len('.onnx')]
         # Derive variant name: model_q4f16.onnx → q4f16, model.onnx → default
-        name = re.sub(r'^model_?', '', stem) or 'default'
+        if stem.startswith('model'):
+            stem = stem[6:] if stem.startswith('model_') else stem[5:]
+        name = stem or 'default'
         has_data = (onnx_file + '_data') in onnx_data_files
         variants.append({
             'name': name,
@@ -257,6 +309,49 @@ def extract_onnx_variants(file_list):
     return variants
 
 
+# Subdirectories the heuristics read: ONNX variants and the sentence-transformers
+# pooling config. Nothing else (weight shards, .git, 2_Dense/...) is listed.
+SCANNED_SUBDIRS = {'onnx', '1_Pooling'}
+
+
+def list_model_files(model_dir):
+    """
+    Set of '/'-separated paths relative to model_dir: top-level files plus
+    the files directly inside SCANNED_SUBDIRS. At most three scandir calls,
+    however large the checkpoint.
+    """
+    files = set()
+    subdirs = []
+    with os.scandir(model_dir) as it:
+        for entry in it:
+            if entry.is_file():
+                files.add(entry.name)
+            elif entry.name in SCANNED_SUBDIRS and entry.is_dir():
+                subdirs.append(entry)
+    for d in subdirs:
+        with os.scandir(d.path) as it:
+            files.update(f'{d.name}/{e.name}' for e in it if e.is_file())
+    return files
+
+
+# config.json keys copied into the result as-is when present
+STRUCTURE_KEYS = ('num_hidden_layers', 'num_attention_heads',
+                  'num_key_value_heads', 'intermediate_size',
+                  'vocab_size', 'max_position_embeddings',
+                  'head_dim')
+
+
+def _load_json(model_dir, rel_path, file_set):
+    """Parse model_dir/rel_path if listed in file_set; None if absent or unreadable."""
+    if rel_path not in file_set:
+        return None
+    try:
+        with open(os.path.join(model_dir, rel_path), 'rb') as f:
+            return json.loads(f.read())
+    except (ValueError, OSError):
+        return None
+
+
 def analyze_model_dir(model_dir):
     """Full analysis of a model directory."""
     config_path = os.path.join(model_dir, 'config.json')
@@ -264,22 +359,19 @@ def analyze_model_dir(model_dir):
         return {"error": f"No config.json found in {model_dir}"}
 
     try:
-        with open(config_path) as f:
-            config = json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
+        with open(config_path, 'rb') as f:
+            config = json.loads(f.read())
+    except (ValueError, OSError) as e:
         return {"error": f"Failed to read config.json: {e}"}
 
     # ── Gather file list (for heuristics) ──
-    file_list = []
-    for root, dirs, files in os.walk(model_dir):
-        for fn in files:
-            rel = os.path.relpath(os.path.join(root, fn), model_dir)
-            file_list.append(rel)
+    file_list = list_model_files(model_dir)
     # Also check just immediate directory for flat repos
     dir_name = os.path.basename(os.path.abspath(model_dir))
 
     # ── Classify ──
-    task_type = detect_task_type(config, file_list, dir_name)
+    task_type = detect_task_type(config, file_list, dir_name,
+                                 top_level_names(file_list))
 
     # ── Build result ──
     result = {
@@ -309,13 +401,7 @@ def analyze_model_dir(model_dir):
         result['embedding_dimension'] = hidden_size
 
     # ── Model structure ──
-    for key in ['num_hidden_layers', 'num_attention_heads',
-                'num_key_value_heads', 'intermediate_size',
-                'vocab_size', 'max_position_embeddings',
-                'head_dim']:
-        val = config.get(key)
-        if val is not None:
-            result[key] = val
+    result.update({k: config[k] for k in STRUCTURE_KEYS if config.get(k) is not None})
 
     # ── Classification-specific ──
     id2label = config.get('id2label')
@@ -342,69 +428,46 @@ def analyze_model_dir(model_dir):
         result['onnx_variants'] = variants
 
     # ── Sentence-transformers metadata ──
-    modules_path = os.path.join(model_dir, 'modules.json')
-    if os.path.isfile(modules_path):
-        try:
-            with open(modules_path) as f:
-                modules = json.load(f)
-            result['sentence_transformers_modules'] = [
-                {'name': m.get('name', ''), 'type': m.get('type', '')}
-                for m in modules
-            ]
-        except Exception:
-            pass
-
-    st_config_path = os.path.join(model_dir, 'config_sentence_transformers.json')
-    if os.path.isfile(st_config_path):
-        try:
-            with open(st_config_path) as f:
-                st_config = json.load(f)
-            if 'prompts' in st_config:
-                result['prompts'] = st_config['prompts']
-            if 'default_prompt_name' in st_config:
-                result['default_prompt_name'] = st_config['default_prompt_name']
-        except Exception:
-            pass
+    # Presence comes from the file listing; no isfile() probe per file.
+    modules = _load_json(model_dir, 'modules.json', file_list)
+    if isinstance(modules, list):
+        result['sentence_transformers_modules'] = [
+            {'name': m.get('name', ''), 'type': m.get('type', '')}
+            for m in modules if isinstance(m, dict)
+        ]
+
+    st_config = _load_json(model_dir, 'config_sentence_transformers.json', file_list)
+    if isinstance(st_config, dict):
+        if 'prompts' in st_config:
+            result['prompts'] = st_config['prompts']
+        if 'default_prompt_name' in st_config:
+            result['default_prompt_name'] = st_config['default_prompt_name']
 
     # ── Pooling config (sentence-transformers) ──
-    pooling_path = os.path.join(model_dir, '1_Pooling', 'config.json')
-    if os.path.isfile(pooling_path):
-        try:
-            with open(pooling_path) as f:
-                pool_config = json.load(f)
-            # Extract just the pooling mode flags
-            pooling_modes = {k: v for k, v in pool_config.items()
-                           if k.startswith('pooling_mode_') and v}
-            if pooling_modes:
-                result['pooling'] = pooling_modes
-        except Exception:
-            pass
+    pool_config = _load_json(model_dir, '1_Pooling/config.json', file_list)
+    if isinstance(pool_config, dict):
+        # Extract just the pooling mode flags
+        pooling_modes = {k: v for k, v in pool_config.items()
+                       if k.startswith('pooling_mode_') and v}
+        if pooling_modes:
+            result['pooling'] = pooling_modes
 
     # ── Generation config ──
-    gen_path = os.path.join(model_dir, 'generation_config.json')
-    if os.path.isfile(gen_path):
+    if 'generation_config.json' in file_list:
         result['has_generation_config'] = True
-        try:
-            with open(gen_path) as f:
-                gen = json.load(f)
+        gen = _load_json(model_dir, 'generation_config.json', file_list)
+        if isinstance(gen, dict):
             for key in ['max_new_tokens', 'max_length', 'do_sample',
                         'temperature', 'top_p', 'top_k']:
                 if key in gen:
                     result.setdefault('generation_defaults', {})[key] = gen[key]
-        except Exception:
-            pass
 
     # ── Tokenizer info ──
-    tok_config_path = os.path.join(model_dir, 'tokenizer_config.json')
-    if os.path.isfile(tok_config_path):
-        try:
-            with open(tok_config_path) as f:
-                tok = json.load(f)
-            result['tokenizer_class'] = tok.get('tokenizer_class', tok.get('model_type', 'unknown'))
-            if 'model_max_length' in tok:
-                result['model_max_length'] = tok['model_max_length']
-        except Exception:
-            pass
+    tok = _load_json(model_dir, 'tokenizer_config.json', file_list)
+    if isinstance(tok, dict):
+        result['tokenizer_class'] = tok.get('tokenizer_class', tok.get('model_type', 'unknown'))
+        if 'model_max_length' in tok:
+            result['model_max_length'] = tok['model_max_length']
 
     return result
 
@@ -419,11 +482,14 @@ def main():
         sys.exit(0)
 
     mode = 'full'
-    if args[0] == '--classify':
-        mode = 'classify'
-        args = args[1:]
-    elif args[0] == '--json':
-        mode = 'full'
+    compact = False
+    while args and args[0] in ('--classify', '--json', '--compact'):
+        if args[0] == '--classify':
+            mode = 'classify'
+        elif args[0] == '--json':
+            mode = 'full'
+        else:
+            compact = True
         args = args[1:]
 
     if not args:
@@ -440,7 +506,13 @@ def main():
     if mode == 'classify':
         print(result.get('classification', 'unknown'))
     else:
-        json.dump(result, sys.stdout, indent=2, default=str)
+        # Raw UTF-8 is shorter to write, but only if stdout can encode it
+        ascii_only = (sys.stdout.encoding or '').lower() not in ('utf-8', 'utf8')
+        if compact:
+            json.dump(result, sys.stdout, ensure_ascii=ascii_only,
+                      separators=(',', ':'), default=str)
+        else:
+            json.dump(result, sys.stdout, ensure_ascii=ascii_only, indent=2, default=str)
         print()
 
 
@@ -0,0 +1,33 @@
+#!/bin/bash
+set -euo pipefail
+
+# =============================================================================
+# precompress-assets.sh — Write .br / .gz siblings for compressible assets
+#
+# cors_server.py serves these instead of the original file when the browser
+# sends a matching Accept-Encoding, trading disk space for network bytes.
+# Tokenizer/config JSON and ONNX graphs typically shrink 3-5×.
+#
+# Usage:
+#   ./precompress-assets.sh                 # current directory (recursive)
+#   ./precompress-assets.sh ./harness       # specific directory
+#
+# Brotli output needs the `brotli` CLI; gzip output is always written.
+# Re-run after replacing an asset — stale siblings would be served otherwise.
+# =============================================================================
+
+ROOT="${1:-.}"
+HAVE_BROTLI=false
+command -v brotli >/dev/null 2>&1 && HAVE_BROTLI=true
+$HAVE_BROTLI || echo "⚠ brotli not found — writing .gz only"
+
+count=0
+while IFS= read -r -d '' f; do
+  gzip -k -9 -f -- "$f"
+  if $HAVE_BROTLI; then
+    brotli -q 11 -f -o "$f.br" -- "$f"
+  fi
+  count=$((count + 1))
+done < <(find "$ROOT" -type f \( -name '*.json' -o -name '*.onnx' -o -name '*.js' -o -name '*.mjs' -o -name '*.wasm' \) -print0)
+
+echo "✓ Precompressed $count file(s) under $ROOT"
@@ -3,28 +3,47 @@
 Test suite for model_resolver.py — validates local flat-repo support.
 Tests all three packaged models: ONNX embedding, ONNX reranker, GGUF LLM.
 """
-import sys, os, json, hashlib, time
-sys.path.insert(0, '/home/claude/WebModelDelivery')
+import sys, os, json, hashlib, time, functools
+from concurrent.futures import ThreadPoolExecutor
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
 from model_resolver import ModelResolver, resolve_model, resolve_gguf
 
-PKG_EMBEDDING = '/home/claude/obtained/pkg-embedding'
-PKG_RERANKER  = '/home/claude/obtained/pkg-reranker'
-PKG_GEMMA3    = '/home/claude/obtained/pkg-gemma3'
+# Packaged models live beside the checkout unless PKG_DIR says otherwise
+PKG_DIR       = os.environ.get('PKG_DIR', os.path.join(HERE, '..', 'obtained'))
+PKG_EMBEDDING = os.path.join(PKG_DIR, 'pkg-embedding')
+PKG_RERANKER  = os.path.join(PKG_DIR, 'pkg-reranker')
+PKG_GEMMA3    = os.path.join(PKG_DIR, 'pkg-gemma3')
 CACHE_DIR     = '/tmp/test-resolver-cache-py'
 
 passed = 0
 failed = 0
 
-def test(name, fn):
-    global passed, failed
+def _run(fn):
     try:
         fn()
+    except Exception as e:
+        return e
+
+def _report(name, err):
+    global passed, failed
+    if err is None:
         print(f'  ✓ {name}')
         passed += 1
-    except Exception as e:
-        print(f'  ✗ {name}: {e}')
+    else:
+        print(f'  ✗ {name}: {err}')
         failed += 1
 
+def test(name, fn):
+    _report(name, _run(fn))
+
+def test_parallel(tests, max_workers=8):
+    """Run independent (name, fn) tests concurrently; report in list order."""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        errors = list(pool.map(_run, [fn for _, fn in tests]))
+    for (name, _), err in zip(tests, errors):
+        _report(name, err)
+
 def assert_eq(a, b, msg=''):
     if a != b:
         raise AssertionError(f'{msg}: {a!r} != {b!r}')
@@ -33,6 +52,15 @@ def assert_true(v, msg=''):
     if not v:
         raise AssertionError(msg or 'assertion failed')
 
+def sha256_file(fp):
+    with open(fp, 'rb') as f:
+        if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        while chunk := f.read(1 << 20):
+            h.update(chunk)
+        return h.hexdigest()
+
 # ─── Clean start ─────────────────────────────────────────────────────────
 
 import shutil
@@ -40,33 +68,34 @@ if os.path.exists(CACHE_DIR):
     shutil.rmtree(CACHE_DIR)
 
 resolver = ModelResolver(cache_dir=CACHE_DIR, verify_sha256=True)
+get_fm = functools.lru_cache(maxsize=None)(resolver.get_filemap)
 
 # ─── Test 1: Filemap loading from local path ────────────────────────────
 
 print('\n=== Filemap Loading ===')
 
 def test_filemap_load_embedding():
-    fm = resolver.get_filemap(PKG_EMBEDDING)
+    fm = get_fm(PKG_EMBEDDING)
     assert_true(fm is not None, 'filemap is None')
     assert_eq(fm['version'], 5, 'version')
     assert_true('files' in fm, 'no files key')
     assert_true(len(fm['files']) == 10, f'expected 10 files, got {len(fm["files"])}')
 
-test('Load embedding filemap from local path', test_filemap_load_embedding)
-
 def test_filemap_load_reranker():
-    fm = resolver.get_filemap(PKG_RERANKER)
+    fm = get_fm(PKG_RERANKER)
     assert_true(fm is not None)
     assert_true('onnx/model_quantized.onnx' in fm['files'])
 
-test('Load reranker filemap from local path', test_filemap_load_reranker)
-
 def test_filemap_load_gguf():
-    fm = resolver.get_filemap(PKG_GEMMA3)
+    fm = get_fm(PKG_GEMMA3)
     assert_true(fm is not None)
     assert_true('gemma-3-1b-it-q4_0.gguf' in fm['files'])
 
-test('Load GGUF filemap from local path', test_filemap_load_gguf)
+test_parallel([
+    ('Load embedding filemap from local path', test_filemap_load_embedding),
+    ('Load reranker filemap from local path', test_filemap_load_reranker),
+    ('Load GGUF filemap from local path', test_filemap_load_gguf),
+])
 
 # ─── Test 2: Manifest listing ───────────────────────────────────────────
 
@@ -77,23 +106,26 @@ def test_list_manifests_embedding():
     assert_true('q4f16' in manifests, f'q4f16 not in {manifests.keys()}')
     assert_true(manifests['q4f16']['size_mb'] > 100, 'manifest too small')
 
-test('List manifests for embedding', test_list_manifests_embedding)
-
 def test_list_manifests_reranker():
     manifests = resolver.list_manifests(PKG_RERANKER)
     assert_true('quantized' in manifests, f'quantized not in {manifests.keys()}')
 
-test('List manifests for reranker', test_list_manifests_reranker)
-
 def test_list_manifests_gguf():
     manifests = resolver.list_manifests(PKG_GEMMA3)
     assert_true('q4_0' in manifests, f'q4_0 not in {manifests.keys()}')
 
-test('List manifests for GGUF', test_list_manifests_gguf)
+test_parallel([
+    ('List manifests for embedding', test_list_manifests_embedding),
+    ('List manifests for reranker', test_list_manifests_reranker),
+    ('List manifests for GGUF', test_list_manifests_gguf),
+])
 
 # ─── Test 3: Resolve with manifest (ONNX embedding) ─────────────────────
 
-print('\n=== Resolve: ONNX Embedding (q4f16) ===')
+# Tests 3-5 resolve different packages into separate output dirs, so they
+# run concurrently; tests that reuse those dirs stay serial below.
+
+print('\n=== Resolve: ONNX Embedding, ONNX Reranker, GGUF LLM ===')
 
 progress_log = []
 
@@ -106,43 +138,23 @@ def test_resolve_embedding():
     )
     assert_true(os.path.isdir(local_dir), f'not a dir: {local_dir}')
     # Check key files exist with correct sizes
-    fm = resolver.get_filemap(PKG_EMBEDDING)
+    fm = get_fm(PKG_EMBEDDING)
     for vp in fm['manifests']['q4f16']['files']:
         fp = os.path.join(local_dir, vp)
         assert_true(os.path.exists(fp), f'missing: {vp}')
         assert_eq(os.path.getsize(fp), fm['files'][vp]['size'], f'size mismatch: {vp}')
 
-test('Resolve embedding to local dir', test_resolve_embedding)
-
-def test_progress_embedding():
-    assert_true(len(progress_log) > 0, 'no progress events')
-    last = progress_log[-1]
-    assert_eq(last['done'], True, 'last event not done')
-    assert_eq(last['percent'], 100, 'last event not 100%')
-    # Check monotonicity
-    pcts = [p['percent'] for p in progress_log]
-    for i in range(1, len(pcts)):
-        assert_true(pcts[i] >= pcts[i-1], f'non-monotonic at {i}: {pcts[i-1]} > {pcts[i]}')
-
-test('Progress tracking (embedding)', test_progress_embedding)
-
 # ─── Test 4: Resolve with manifest (ONNX reranker) ──────────────────────
 
-print('\n=== Resolve: ONNX Reranker (quantized) ===')
-
 def test_resolve_reranker():
     local_dir = resolver.resolve(PKG_RERANKER, manifest='quantized')
-    fm = resolver.get_filemap(PKG_RERANKER)
+    fm = get_fm(PKG_RERANKER)
     onnx_path = os.path.join(local_dir, 'onnx/model_quantized.onnx')
     assert_true(os.path.exists(onnx_path), 'onnx model missing')
     assert_eq(os.path.getsize(onnx_path), fm['files']['onnx/model_quantized.onnx']['size'])
 
-test('Resolve reranker to local dir', test_resolve_reranker)
-
 # ─── Test 5: Resolve GGUF ───────────────────────────────────────────────
 
-print('\n=== Resolve: GGUF LLM (q4_0) ===')
-
 def test_resolve_gguf():
     files = resolver.resolve_files(PKG_GEMMA3, manifest='q4_0')
     gguf_files = [p for vp, p in files.items() if vp.endswith('.gguf')]
@@ -151,7 +163,23 @@ def test_resolve_gguf():
         assert_true(os.path.exists(gf), f'missing: {gf}')
         assert_true(os.path.getsize(gf) > 0, f'empty: {gf}')
 
-test('Resolve GGUF files', test_resolve_gguf)
+test_parallel([
+    ('Resolve embedding to local dir', test_resolve_embedding),
+    ('Resolve reranker to local dir', test_resolve_reranker),
+    ('Resolve GGUF files', test_resolve_gguf),
+])
+
+def test_progress_embedding():
+    assert_true(len(progress_log) > 0, 'no progress events')
+    last = progress_log[-1]
+    assert_eq(last['done'], True, 'last event not done')
+    assert_eq(last['percent'], 100, 'last event not 100%')
+    # Check monotonicity
+    pcts = [p['percent'] for p in progress_log]
+    for i in range(1, len(pcts)):
+        assert_true(pcts[i] >= pcts[i-1], f'non-monotonic at {i}: {pcts[i-1]} > {pcts[i]}')
+
+test('Progress tracking (embedding)', test_progress_embedding)
 
 # ─── Test 6: resolve_gguf convenience ───────────────────────────────────
 
@@ -176,12 +204,97 @@ def test_sha256_verify():
     fm = vr.get_filemap(PKG_EMBEDDING)
     config_entry = fm['files']['config.json']
     fp = os.path.join(local_dir, 'config.json')
-    h = hashlib.sha256(open(fp, 'rb').read()).hexdigest()
+    h = sha256_file(fp)
     assert_eq(h, config_entry['sha256'], 'SHA256 mismatch')
     shutil.rmtree(CACHE_DIR + '-sha')
 
 test('SHA256 verification on resolve', test_sha256_verify)
 
+def test_sha256_corrupt_shard():
+    # A 19 MiB shard (the packager's chunk size) whose bytes don't match the
+    # filemap must fail the resolve and leave nothing behind in the cache
+    from model_resolver import ModelFileServer
+    pkg = CACHE_DIR + '-corrupt-pkg'
+    os.makedirs(pkg, exist_ok=True)
+    data = os.urandom(19922944)
+    digest = hashlib.sha256(data).hexdigest()
+    with open(os.path.join(pkg, 'model.bin.shard.000'), 'wb') as f:
+        f.write(data[:-1] + bytes([data[-1] ^ 0xFF]))
+    with open(os.path.join(pkg, 'filemap.json'), 'w') as f:
+        json.dump({'version': 5, 'files': {'model.bin': {
+            'size': len(data), 'sha256': digest, 'cdn_file': 'model.bin',
+            'shards': [{'file': 'model.bin.shard.000', 'offset': 0,
+                        'size': len(data), 'sha256': digest}]}}}, f)
+    server = ModelFileServer(pkg)
+    try:
+        for ranged in (False, True):
+            cache = CACHE_DIR + '-corrupt'
+            shutil.rmtree(cache, ignore_errors=True)  # left over by a failed run
+            vr = ModelResolver(cache_dir=cache, verify_sha256=True, retries=1)
+            if ranged:
+                vr.RANGED_MIN_SIZE = 1024 * 1024
+            try:
+                vr.resolve(server.url)
+                raise AssertionError('corrupted shard was accepted')
+            except RuntimeError as e:
+                assert_true('SHA256 mismatch' in str(e), str(e))
+            left = [f for _, _, fs in os.walk(os.path.join(cache, 'shards')) for f in fs]
+            assert_eq(left, [], f'shard cache not empty (ranged={ranged})')
+            left = [f for _, _, fs in os.walk(os.path.join(cache, 'resolved')) for f in fs]
+            assert_eq(left, [], f'resolved dir not empty (ranged={ranged})')
+            shutil.rmtree(cache)
+    finally:
+        server.shutdown()
+        shutil.rmtree(pkg)
+
+test('Corrupted 19 MiB shard leaves nothing cached', test_sha256_corrupt_shard)
+
+def test_truncated_shard():
+    # A server that drops the connection partway through a body sent without
+    # Content-Length: reading to EOF looks complete, so the shard's size must
+    # catch it, on the pooled and the plain urlopen path alike
+    import threading
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    data = os.urandom(1 << 20)
+    digest = hashlib.sha256(data).hexdigest()
+    filemap = json.dumps({'version': 5, 'files': {'model.bin': {
+        'size': len(data), 'sha256': digest, 'cdn_file': 'model.bin',
+        'shards': [{'file': 'model.bin.shard.000', 'offset': 0,
+                    'size': len(data), 'sha256': digest}]}}}).encode()
+
+    class Truncating(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = filemap if self.path.endswith('filemap.json') else data[:len(data) // 2]
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Truncating)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        for pooled in (True, False):
+            cache = CACHE_DIR + '-truncated'
+            shutil.rmtree(cache, ignore_errors=True)  # left over by a failed run
+            vr = ModelResolver(cache_dir=cache, retries=1)
+            if not pooled:
+                vr._pool = False  # as if urllib3 were missing
+            try:
+                vr.resolve(f'http://127.0.0.1:{server.server_port}')
+                raise AssertionError('truncated shard was accepted')
+            except RuntimeError as e:
+                assert_true('Short response' in str(e), str(e))
+            left = [f for _, _, fs in os.walk(os.path.join(cache, 'shards')) for f in fs]
+            assert_eq(left, [], f'shard cache not empty (pooled={pooled})')
+            shutil.rmtree(cache)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+test('Truncated shard body is rejected, not cached', test_truncated_shard)
+
 # ─── Test 8: Cache skip (second resolve is fast) ────────────────────────
 
 print('\n=== Cache Skip ===')
@@ -199,15 +312,25 @@ test('Second resolve skips (cached)', test_cache_skip)
 
 print('\n=== CLI: list command ===')
 
+# CLI checks run main() in-process, skipping interpreter startup per check
+
+def run_cli(*argv):
+    import io, contextlib, model_resolver
+    buf = io.StringIO()
+    saved = sys.argv
+    sys.argv = ['model_resolver.py', *argv]
+    try:
+        with contextlib.redirect_stdout(buf):
+            model_resolver.main()
+    except SystemExit as e:
+        assert_true(not e.code, f'exit code {e.code}')
+    finally:
+        sys.argv = saved
+    return buf.getvalue()
+
 def test_cli_list():
-    import subprocess
-    r = subprocess.run(
-        [sys.executable, '/home/claude/WebModelDelivery/model_resolver.py',
-         'list', PKG_EMBEDDING, '--cache-dir', CACHE_DIR],
-        capture_output=True, text=True
-    )
-    assert_eq(r.returncode, 0, f'exit code {r.returncode}')
-    assert_true('q4f16' in r.stdout, f'q4f16 not in output: {r.stdout}')
+    out = run_cli('list', PKG_EMBEDDING, '--cache-dir', CACHE_DIR)
+    assert_true('q4f16' in out, f'q4f16 not in output: {out}')
 
 test('CLI: list manifests', test_cli_list)
 